@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Numeric kernels for the CAPEX analyzer
+
+把单个公司的比率、环比增速和预警计数合并为一次遍历的 Numba 内核。
+未安装 numba 时退化为等价的 NumPy 向量化实现。
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba 为可选依赖
+    njit = None
+
+
+def _analyze_loop(revenue, capex, window, threshold):
+    """
+    单次遍历计算 CAPEX 强度、环比增速与预警季度数
+
+    Args:
+        revenue: 按时间升序排列的营收 (float64 ndarray)
+        capex: 与 revenue 对齐的资本支出 (float64 ndarray)
+        window: 统计预警的最近季度数
+        threshold: CAPEX 增速超过 Revenue 增速多少个百分点记为预警
+
+    Returns:
+        (ratio, revenue_growth, capex_growth, warning_quarters)
+        增速单位为百分比，首个季度的增速为 NaN
+    """
+    n = revenue.shape[0]
+    ratio = np.empty(n)
+    rev_g = np.empty(n)
+    cap_g = np.empty(n)
+    warn = 0
+    # 与 tail(window) 一致：窗口内第一个季度没有可比的上期增速
+    start = max(1, n - window + 1)
+
+    for i in range(n):
+        if revenue[i] != 0:
+            ratio[i] = capex[i] / revenue[i]
+        else:
+            ratio[i] = np.nan
+
+        if i == 0:
+            rev_g[i] = np.nan
+            cap_g[i] = np.nan
+            continue
+
+        rev_g[i] = (revenue[i] / revenue[i - 1] - 1.0) * 100.0
+        cap_g[i] = (capex[i] / capex[i - 1] - 1.0) * 100.0
+        # NaN 参与比较结果为 False，缺失数据不计入预警
+        if i >= start and cap_g[i] - rev_g[i] > threshold:
+            warn += 1
+
+    return ratio, rev_g, cap_g, warn
+
+
+def _analyze_numpy(revenue, capex, window, threshold):
+    """与 _analyze_loop 等价的 NumPy 实现，用切片代替 pct_change 与逐行循环"""
+    n = revenue.shape[0]
+    ratio = np.full(n, np.nan)
+    rev_g = np.full(n, np.nan)
+    cap_g = np.full(n, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(capex, revenue, out=ratio, where=revenue != 0)
+        rev_g[1:] = (revenue[1:] / revenue[:-1] - 1.0) * 100.0
+        cap_g[1:] = (capex[1:] / capex[:-1] - 1.0) * 100.0
+        start = max(1, n - window + 1)
+        warn = int(np.count_nonzero(cap_g[start:] - rev_g[start:] > threshold))
+    return ratio, rev_g, cap_g, warn
+
+
+if njit is not None:
+    # 未使用 fastmath：它假定输入中没有 NaN，而缺失的财务数据正是以 NaN 表示
+    analyze = njit(cache=True, error_model='numpy')(_analyze_loop)
+    # 导入时预热一次，使 JIT 编译成本不落在第一个标的上
+    analyze(np.ones(2), np.ones(2), 4, 20.0)
+else:
+    analyze = _analyze_numpy
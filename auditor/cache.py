@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+File Cache
+
+基于本地文件的 TTL 缓存，用于避免重复下载同一天的财务数据。
+- DataFrame 以 Parquet 格式存储（列式、压缩）
+- 其他对象（如 dict）以 JSON 格式存储
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import date
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+
+class FileCache:
+    """带过期时间的文件缓存"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: int = 86400):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(ticker: str, endpoint: str) -> str:
+        """按 (ticker, endpoint, 当天日期) 生成缓存键"""
+        raw = f"{ticker}:{endpoint}:{date.today().isoformat()}"
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def _is_fresh(self, path: str) -> bool:
+        return os.path.exists(path) and time.time() - os.path.getmtime(path) < self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期时返回 None"""
+        try:
+            path = self._path(key, 'parquet')
+            if self._is_fresh(path):
+                return pd.read_parquet(path)
+
+            path = self._path(key, 'json')
+            if self._is_fresh(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 读取缓存失败 ({key}): {e}")
+        return None
+
+    def set(self, key: str, obj: Any) -> None:
+        """写入缓存，写入失败不影响主流程"""
+        try:
+            if isinstance(obj, pd.DataFrame):
+                obj.to_parquet(self._path(key, 'parquet'))
+            else:
+                with open(self._path(key, 'json'), 'w', encoding='utf-8') as f:
+                    json.dump(obj, f, ensure_ascii=False, default=str)
+        except Exception as e:
+            print(f"⚠️ 写入缓存失败 ({key}): {e}")
+
+    @staticmethod
+    def _is_incomplete(obj: Any) -> bool:
+        """空结果意味着接口异常；财报中最早的季度整列为 NaN 属正常情况，不视为失败"""
+        return obj is None or (isinstance(obj, pd.DataFrame) and obj.empty)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """命中缓存则直接返回，否则调用 fetch 获取并写入缓存"""
+        obj = self.get(key)
+        if obj is None:
+            obj = fetch()
+            # 不完整的结果不写入缓存，以免屏蔽当天后续重试
+            if not self._is_incomplete(obj):
+                self.set(key, obj)
+        return obj
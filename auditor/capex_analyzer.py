@@ -10,15 +10,31 @@ Mag 7 CAPEX Analyzer
 - 泡沫风险预警
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 import warnings
+
+import _kernels
+from cache import FileCache
 warnings.filterwarnings('ignore')
 
 
+# yfinance 导入耗时较长，延迟到首次使用时再导入，见 _yf()
+yf = None
+
+
+def _yf():
+    """返回 yfinance 模块，首次调用时导入并缓存"""
+    global yf
+    if yf is None:
+        import yfinance
+        yf = yfinance
+    return yf
+
+
 # Mag 7 股票代码
 MAG7_TICKERS = {
     'MSFT': 'Microsoft',
@@ -31,45 +47,55 @@ MAG7_TICKERS = {
 }
 
 
+def _ok(x) -> bool:
+    """标量非空判断（NaN 不等于自身），避免在打印路径上逐个调用 pd.notna"""
+    return x is not None and x == x
+
+
 class Mag7Analyzer:
     """Mag 7 财务分析器"""
     
     def __init__(self):
         self.data = {}
         self.results = []
+        self.cache = FileCache()
         
-    def fetch_financial_data(self, ticker: str) -> Dict:
+    def fetch_financial_data(self, ticker: str, stock: Optional['yf.Ticker'] = None) -> Dict:
         """
         获取股票财务数据
         
+        Args:
+            ticker: 股票代码
+            stock: 可选的共享 yf.Ticker 对象（批量获取时由 yf.Tickers 提供）
+        
         Returns:
             Dict 包含：
             - quarterly_income_stmt: 季度损益表
             - quarterly_cash_flow: 季度现金流量表
-            - info: 公司基本信息
         """
         try:
-            print(f"   正在连接 Yahoo Finance API...")
-            stock = yf.Ticker(ticker)
+            if stock is None:
+                stock = _yf().Ticker(ticker)
             
-            # 获取季度损益表
-            income_stmt = stock.quarterly_income_stmt
-            print(f"   损益表列数: {len(income_stmt.columns) if income_stmt is not None else 0}")
+            # 获取季度损益表（当天已下载过则直接读取本地缓存）
+            income_stmt = self.cache.get_or_fetch(
+                FileCache.make_key(ticker, 'quarterly_income_stmt'),
+                lambda: stock.quarterly_income_stmt
+            )
+            print(f"   [{ticker}] 损益表列数: {len(income_stmt.columns) if income_stmt is not None else 0}")
             
             # 获取季度现金流量表
-            cash_flow = stock.quarterly_cash_flow
-            print(f"   现金流表列数: {len(cash_flow.columns) if cash_flow is not None else 0}")
-            
-            # 获取公司信息
-            info = stock.info
+            cash_flow = self.cache.get_or_fetch(
+                FileCache.make_key(ticker, 'quarterly_cash_flow'),
+                lambda: stock.quarterly_cash_flow
+            )
+            print(f"   [{ticker}] 现金流表列数: {len(cash_flow.columns) if cash_flow is not None else 0}")
             
             return {
                 'ticker': ticker,
                 'name': MAG7_TICKERS.get(ticker, ticker),
                 'income_stmt': income_stmt,
-                'cash_flow': cash_flow,
-                'info': info,
-                'market_cap': info.get('marketCap', 0)
+                'cash_flow': cash_flow
             }
         except Exception as e:
             print(f"❌ 获取 {ticker} 数据失败: {e}")
@@ -84,6 +110,19 @@ class Mag7Analyzer:
             return f"{date.year}-Q{quarter}"
         return str(date)
     
+    def _extract_row(self, frame: pd.DataFrame, fields: List[str], quarters: List) -> Optional[np.ndarray]:
+        """
+        按候选字段名顺序查找报表中的第一行，并按 quarters 顺序取出为数组
+        
+        Returns:
+            找到字段时返回对应季度的数值数组（缺失季度为 NaN），否则返回 None
+        """
+        index = set(frame.index)
+        field = next((f for f in fields if f in index), None)
+        if field is None:
+            return None
+        return frame.loc[field].reindex(quarters).to_numpy()
+    
     def extract_quarterly_metrics(self, data: Dict) -> pd.DataFrame:
         """
         从财务报表中提取季度指标
@@ -108,47 +147,49 @@ class Mag7Analyzer:
             quarters = list(income_stmt.columns[:4])  # 最近4个季度
             print(f"   可用季度: {[self.format_quarter(q) for q in quarters]}")
             
-            for quarter in quarters:
+            if cash_flow is None:
+                cash_flow = pd.DataFrame()
+            
+            # 每个指标只解析一次命中的字段名，整行取出为数组后按季度位置索引
+            # 从损益表获取 Revenue
+            revenue_row = self._extract_row(
+                income_stmt, ['TotalRevenue', 'Revenue', 'Total Revenue'], quarters
+            )
+            # 从现金流量表获取 Capital Expenditure
+            capex_row = self._extract_row(
+                cash_flow,
+                ['CapitalExpenditure', 'Capital Expenditures', 'PurchaseOfPPE',
+                 'Purchase of Property Plant and Equipment', 'Capital Expenditure'],
+                quarters
+            )
+            # 从现金流量表获取 Free Cash Flow
+            fcf_row = self._extract_row(cash_flow, ['FreeCashFlow', 'Free Cash Flow'], quarters)
+            # 如果找不到 FCF，用经营现金流计算
+            ocf_row = None
+            if fcf_row is None:
+                ocf_row = self._extract_row(
+                    cash_flow,
+                    ['OperatingCashFlow', 'Total Cash From Operating Activities',
+                     'Cash Flow From Operating Activities'],
+                    quarters
+                )
+            
+            uses_cash_flow = capex_row is not None or fcf_row is not None or ocf_row is not None
+            cf_quarters = set(cash_flow.columns)
+            
+            for j, quarter in enumerate(quarters):
                 quarter_str = self.format_quarter(quarter)
                 
                 try:
-                    # 从损益表获取 Revenue
-                    revenue = None
-                    revenue_fields = ['TotalRevenue', 'Revenue', 'Total Revenue']
-                    for field in revenue_fields:
-                        if field in income_stmt.index:
-                            revenue = income_stmt.loc[field, quarter]
-                            break
-                    
-                    # 从现金流量表获取 Capital Expenditure
-                    capex = None
-                    capex_fields = ['CapitalExpenditure', 'Capital Expenditures', 'PurchaseOfPPE', 
-                                   'Purchase of Property Plant and Equipment', 'Capital Expenditure']
-                    for field in capex_fields:
-                        if field in cash_flow.index:
-                            capex = cash_flow.loc[field, quarter]
-                            break
+                    if uses_cash_flow and quarter not in cf_quarters:
+                        raise KeyError(f"现金流量表缺少季度 {quarter_str}")
                     
-                    # 从现金流量表获取 Free Cash Flow
-                    fcf = None
-                    fcf_fields = ['FreeCashFlow', 'Free Cash Flow']
-                    for field in fcf_fields:
-                        if field in cash_flow.index:
-                            fcf = cash_flow.loc[field, quarter]
-                            break
+                    revenue = revenue_row[j] if revenue_row is not None else None
+                    capex = capex_row[j] if capex_row is not None else None
+                    fcf = fcf_row[j] if fcf_row is not None else None
                     
-                    # 如果找不到 FCF，尝试计算
-                    if fcf is None:
-                        ocf = None
-                        ocf_fields = ['OperatingCashFlow', 'Total Cash From Operating Activities', 
-                                     'Cash Flow From Operating Activities']
-                        for field in ocf_fields:
-                            if field in cash_flow.index:
-                                ocf = cash_flow.loc[field, quarter]
-                                break
-                        
-                        if ocf is not None and capex is not None:
-                            fcf = ocf + capex  # capex 通常是负数
+                    if fcf is None and ocf_row is not None and capex is not None:
+                        fcf = ocf_row[j] + capex  # capex 通常是负数
                     
                     print(f"   {quarter_str}: Revenue={revenue is not None}, CAPEX={capex is not None}, FCF={fcf is not None}")
                     
@@ -177,13 +218,11 @@ class Mag7Analyzer:
         if df.empty:
             return df
         
-        # CAPEX 强度 = CAPEX / Revenue
-        df['CAPEX_Ratio'] = df.apply(
-            lambda row: row['CAPEX'] / row['Revenue'] 
-            if pd.notna(row['CAPEX']) and pd.notna(row['Revenue']) and row['Revenue'] != 0 
-            else None,
-            axis=1
-        )
+        # CAPEX 强度 = CAPEX / Revenue（向量化计算，Revenue 为 0 或缺失时为 NaN）
+        rev = df['Revenue'].to_numpy(dtype=np.float64)
+        cap = df['CAPEX'].to_numpy(dtype=np.float64)
+        valid = (rev != 0) & ~np.isnan(rev) & ~np.isnan(cap)
+        df['CAPEX_Ratio'] = np.divide(cap, rev, out=np.full_like(cap, np.nan), where=valid)
         
         return df
     
@@ -195,40 +234,33 @@ class Mag7Analyzer:
             Dict 包含趋势分析结果和预警信息
         """
         if df.empty or len(df) < 2:
-            return {'status': 'insufficient_data', 'warning': False, 'ticker': df['Ticker'].iloc[0] if not df.empty else 'Unknown'}
+            return {'status': 'insufficient_data', 'warning': False, 'ticker': df['Ticker'].iat[0] if not df.empty else 'Unknown'}
         
-        # 按时间排序
-        df = df.sort_values('Quarter_Date')
+        # 按时间排序（只对数组排序，不复制也不改变调用方表格）
+        order = np.argsort(df['Quarter_Date'].to_numpy(), kind='stable')
+        revenue = df['Revenue'].to_numpy(dtype=np.float64)[order]
+        capex = df['CAPEX'].to_numpy(dtype=np.float64)[order]
         
-        # 计算增速（季度环比）
-        df['Revenue_Growth'] = df['Revenue'].pct_change() * 100
-        df['CAPEX_Growth'] = df['CAPEX'].pct_change() * 100
-        
-        # 分析最近4个季度的趋势
-        recent_data = df.tail(4)
+        # 单次遍历计算 CAPEX 强度、季度环比增速与预警季度数
+        # 预警条件：最近4个季度内 CAPEX 增长超过 Revenue 增长 20 个百分点以上
+        ratio, revenue_growth, capex_growth, warning_quarters = _kernels.analyze(
+            revenue, capex, 4, 20.0
+        )
         
-        # 计算平均增速
-        avg_revenue_growth = recent_data['Revenue_Growth'].mean()
-        avg_capex_growth = recent_data['CAPEX_Growth'].mean()
+        # 计算最近4个季度的平均增速
+        avg_revenue_growth = np.nanmean(revenue_growth[-4:])
+        avg_capex_growth = np.nanmean(capex_growth[-4:])
         
         # 判断是否有泡沫风险
         # 条件：CAPEX 增速持续远超 Revenue 增速（连续2个季度以上）
-        warning_quarters = 0
-        for idx in range(1, len(recent_data)):
-            row = recent_data.iloc[idx]
-            if pd.notna(row['CAPEX_Growth']) and pd.notna(row['Revenue_Growth']):
-                # CAPEX 增长超过 Revenue 增长 20 个百分点以上
-                if row['CAPEX_Growth'] - row['Revenue_Growth'] > 20:
-                    warning_quarters += 1
-        
         has_bubble_risk = warning_quarters >= 2
         
-        # 计算最新 CAPEX 强度
-        latest_capex_ratio = df['CAPEX_Ratio'].iloc[-1] if not df.empty else None
+        # 最新 CAPEX 强度
+        latest_capex_ratio = ratio[-1]
         
         return {
-            'ticker': df['Ticker'].iloc[0],
-            'company': df['Company'].iloc[0],
+            'ticker': df['Ticker'].iat[0],
+            'company': df['Company'].iat[0],
             'quarters_analyzed': len(df),
             'avg_revenue_growth': avg_revenue_growth,
             'avg_capex_growth': avg_capex_growth,
@@ -254,30 +286,34 @@ class Mag7Analyzer:
         print(f"{'Quarter':<15} {'Revenue':>18} {'CAPEX':>18} {'FCF':>18} {'CAPEX%':>10}")
         print("-" * 80)
         
-        for _, row in metrics_df.iterrows():
-            rev = f"${row['Revenue']/1e9:.2f}B" if pd.notna(row['Revenue']) else "N/A"
-            capex = f"${row['CAPEX']/1e9:.2f}B" if pd.notna(row['CAPEX']) else "N/A"
-            fcf = f"${row['FCF']/1e9:.2f}B" if pd.notna(row['FCF']) else "N/A"
-            ratio = f"{row['CAPEX_Ratio']*100:.1f}%" if pd.notna(row['CAPEX_Ratio']) else "N/A"
+        cols = ['Quarter', 'Revenue', 'CAPEX', 'FCF', 'CAPEX_Ratio']
+        for quarter, revenue, capex, fcf, capex_ratio in metrics_df[cols].itertuples(index=False, name=None):
+            rev = f"${revenue/1e9:.2f}B" if _ok(revenue) else "N/A"
+            capex = f"${capex/1e9:.2f}B" if _ok(capex) else "N/A"
+            fcf = f"${fcf/1e9:.2f}B" if _ok(fcf) else "N/A"
+            ratio = f"{capex_ratio*100:.1f}%" if _ok(capex_ratio) else "N/A"
             
-            print(f"{row['Quarter']:<15} {rev:>18} {capex:>18} {fcf:>18} {ratio:>10}")
+            print(f"{quarter:<15} {rev:>18} {capex:>18} {fcf:>18} {ratio:>10}")
         
         print("-" * 80)
         
         # 打印趋势分析
         print(f"\n📊 趋势分析 (过去 {analysis.get('quarters_analyzed', 0)} 个季度):")
-        if pd.notna(analysis.get('avg_revenue_growth')):
-            print(f"   • 平均营收增速: {analysis['avg_revenue_growth']:+.1f}%")
+        avg_revenue_growth = analysis.get('avg_revenue_growth')
+        if _ok(avg_revenue_growth):
+            print(f"   • 平均营收增速: {avg_revenue_growth:+.1f}%")
         else:
             print(f"   • 平均营收增速: N/A")
             
-        if pd.notna(analysis.get('avg_capex_growth')):
-            print(f"   • 平均 CAPEX 增速: {analysis['avg_capex_growth']:+.1f}%")
+        avg_capex_growth = analysis.get('avg_capex_growth')
+        if _ok(avg_capex_growth):
+            print(f"   • 平均 CAPEX 增速: {avg_capex_growth:+.1f}%")
         else:
             print(f"   • 平均 CAPEX 增速: N/A")
             
-        if pd.notna(analysis.get('latest_capex_ratio')):
-            print(f"   • 最新 AI 投入强度: {analysis['latest_capex_ratio']*100:.1f}%")
+        latest_capex_ratio = analysis.get('latest_capex_ratio')
+        if _ok(latest_capex_ratio):
+            print(f"   • 最新 AI 投入强度: {latest_capex_ratio*100:.1f}%")
         else:
             print(f"   • 最新 AI 投入强度: N/A")
         
@@ -309,18 +345,16 @@ class Mag7Analyzer:
             print("❌ 未能获取有效的财务数据")
             return
         
-        # 按 AI 投入强度排序
-        sorted_analysis = sorted(
-            valid_analysis,
-            key=lambda x: x.get('latest_capex_ratio', 0) if pd.notna(x.get('latest_capex_ratio')) else 0,
-            reverse=True
-        )
+        # 按 AI 投入强度降序排序（缺失值按 0 处理，稳定排序保持原有并列顺序）
+        ratios = np.array([a.get('latest_capex_ratio') for a in valid_analysis], dtype=np.float64)
+        order = np.argsort(-np.nan_to_num(ratios, nan=0.0), kind='stable')
+        sorted_analysis = [valid_analysis[i] for i in order]
         
         print("\n🏆 AI 投入强度排行榜 (CAPEX / Revenue):")
         print("-" * 60)
         for i, analysis in enumerate(sorted_analysis, 1):
             ratio = analysis.get('latest_capex_ratio')
-            ratio_str = f"{ratio*100:.1f}%" if pd.notna(ratio) else "N/A"
+            ratio_str = f"{ratio*100:.1f}%" if _ok(ratio) else "N/A"
             risk_indicator = "🔴" if analysis.get('bubble_risk') else "🟢"
             print(f"{i}. {analysis.get('company', 'Unknown'):<25} {ratio_str:>8} {risk_indicator}")
         
@@ -333,8 +367,8 @@ class Mag7Analyzer:
                 print(f"   • {company.get('company', 'Unknown')} ({company.get('ticker', 'Unknown')})")
                 rev_growth = company.get('avg_revenue_growth')
                 capex_growth = company.get('avg_capex_growth')
-                rev_str = f"{rev_growth:+.1f}%" if pd.notna(rev_growth) else "N/A"
-                capex_str = f"{capex_growth:+.1f}%" if pd.notna(capex_growth) else "N/A"
+                rev_str = f"{rev_growth:+.1f}%" if _ok(rev_growth) else "N/A"
+                capex_str = f"{capex_growth:+.1f}%" if _ok(capex_growth) else "N/A"
                 print(f"     CAPEX 增速: {capex_str} | Revenue 增速: {rev_str}")
             print("🚨"*40)
         else:
@@ -359,13 +393,24 @@ class Mag7Analyzer:
         
         all_analysis = []
         
+        # 并发获取所有标的的财务数据（网络 I/O 密集，线程可并行等待）
+        print(f"⏳ 正在并发获取 {len(MAG7_TICKERS)} 家公司的财务数据...")
+        tickers = _yf().Tickers(' '.join(MAG7_TICKERS))
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=len(MAG7_TICKERS)) as executor:
+            futures = {
+                executor.submit(self.fetch_financial_data, ticker, tickers.tickers[ticker]): ticker
+                for ticker in MAG7_TICKERS
+            }
+            for future in as_completed(futures):
+                fetched[futures[future]] = future.result()
+        
         for ticker, name in MAG7_TICKERS.items():
             print(f"\n{'='*80}")
-            print(f"⏳ 正在获取 {name} ({ticker}) 的财务数据...")
+            print(f"⏳ 正在分析 {name} ({ticker}) 的财务数据...")
             print('='*80)
             
-            # 获取数据
-            data = self.fetch_financial_data(ticker)
+            data = fetched.get(ticker)
             if data is None:
                 print(f"❌ {ticker}: 数据获取失败")
                 continue
@@ -12,6 +12,205 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Tuple
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the greedy path then runs as plain Python
+    njit = None
+
+# Only cache compiled kernels when imported: the on-disk cache records the module
+# name, so entries written under __main__ and under the package name would clash
+_JIT_CACHE = __name__ != "__main__"
+
+
+# SCIP settings: stop at a 0.01% relative gap instead of proving optimality
+# (indistinguishable in dollar terms for an allocation) with a tight feasibility tolerance
+SCIP_PARAMS = {'limits/gap': 1e-4, 'numerics/feastol': 1e-7}
+
+# Problems up to this many assets are solved exactly by greedy start + bounded search instead of SCIP
+GREEDY_MAX_ASSETS = 16
+
+# Cache of parametrized problems keyed by number of assets:
+# n -> (problem, shares, p_hat, w_target)
+_problem_cache: Dict[int, Tuple[cp.Problem, cp.Variable, cp.Parameter, cp.Parameter]] = {}
+
+
+def _get_problem(n: int) -> Tuple[cp.Problem, cp.Variable, cp.Parameter, cp.Parameter]:
+    """
+    Build (or fetch from cache) the DPP-compliant allocation problem for n assets.
+    
+    Prices and target weights enter as parameters, so repeated solves with the
+    same number of assets skip CVXPY canonicalization.
+    
+    Args:
+        n: Number of assets
+        
+    Returns:
+        Tuple of (problem, shares, p_hat, w_target)
+        - problem: The cached cvxpy Problem
+        - shares: Integer decision variable (number of shares per asset)
+        - p_hat: Parameter for prices scaled by total amount
+        - w_target: Parameter for target weights
+    """
+    if n not in _problem_cache:
+        # Define decision variable: integer number of shares for each asset
+        shares = cp.Variable(n, integer=True)
+        p_hat = cp.Parameter(n, nonneg=True)
+        w_target = cp.Parameter(n)
+        
+        # Calculate actual weights based on shares and prices
+        # weight_i = (shares_i * price_i) / total_amount = shares_i * p_hat_i
+        # We use total_amount as the denominator for the target comparison
+        actual_weights = cp.multiply(shares, p_hat)
+        
+        # Objective: Minimize sum of squared errors between actual and target weights
+        objective = cp.Minimize(cp.sum_squares(actual_weights - w_target))
+        
+        # Constraints:
+        # 1. Total cost cannot exceed available amount (i.e. weights sum to at most 1)
+        # 2. Shares must be non-negative integers (already defined as integer variable)
+        # 3. Shares must be >= 0
+        constraints = [
+            cp.sum(actual_weights) <= 1,  # Cannot exceed budget
+            shares >= 0  # Non-negative shares
+        ]
+        
+        _problem_cache[n] = (cp.Problem(objective, constraints), shares, p_hat, w_target)
+    
+    return _problem_cache[n]
+
+
+def _greedy_allocate(w_target: np.ndarray, p_hat: np.ndarray) -> np.ndarray:
+    """
+    Allocate integer shares greedily for small portfolios.
+    
+    Starts from the continuous optimum rounded down, then repeatedly applies
+    the affordable move that most reduces the squared weight error: buying one
+    share, or swapping one share of an asset for one of another. Stops when no
+    move improves the error.
+    
+    Args:
+        w_target: Array of target weights
+        p_hat: Array of prices divided by the total amount
+        
+    Returns:
+        Array of non-negative integer share counts
+    """
+    n = p_hat.shape[0]
+    shares = np.maximum(np.floor(w_target / p_hat), 0.0).astype(np.int64)
+    spent = 0.0
+    for i in range(n):
+        spent += shares[i] * p_hat[i]
+    
+    while True:
+        # Best single move: buy one share of j, optionally selling one share of i
+        # (i == -1 means a pure purchase). Stop when no affordable move helps.
+        best_i = -1
+        best_j = -1
+        best_gain = 0.0
+        for j in range(n):
+            err_j = shares[j] * p_hat[j] - w_target[j]
+            buy_gain = (err_j + p_hat[j]) ** 2 - err_j ** 2
+            for i in range(-1, n):
+                if i == j or (i >= 0 and shares[i] == 0):
+                    continue
+                cost = p_hat[j]
+                gain = buy_gain
+                if i >= 0:
+                    err_i = shares[i] * p_hat[i] - w_target[i]
+                    cost -= p_hat[i]
+                    gain += (err_i - p_hat[i]) ** 2 - err_i ** 2
+                if spent + cost > 1.0 + 1e-9:  # Cannot exceed budget
+                    continue
+                if gain < best_gain - 1e-15:
+                    best_i = i
+                    best_j = j
+                    best_gain = gain
+        if best_j < 0:
+            break
+        shares[best_j] += 1
+        spent += p_hat[best_j]
+        if best_i >= 0:
+            shares[best_i] -= 1
+            spent -= p_hat[best_i]
+    
+    return shares
+
+
+def _refine_allocation(w_target: np.ndarray, p_hat: np.ndarray, shares: np.ndarray) -> np.ndarray:
+    """
+    Turn a feasible allocation into the exact integer optimum by bounded search.
+    
+    Let E be the squared weight error of the starting allocation. Any allocation
+    at least as good has |shares_i * p_hat_i - w_target_i| <= sqrt(E) for every
+    asset, so only that window of share counts (further capped by the remaining
+    budget) is enumerated, depth first. A branch is pruned when its partial error
+    plus a lower bound for the remaining assets reaches the best error so far.
+    The bound is the continuous optimum ignoring shares >= 0: if the remaining
+    targets exceed the remaining budget by D over m assets, the error is at
+    least D**2 / m.
+    
+    Args:
+        w_target: Array of target weights
+        p_hat: Array of prices divided by the total amount
+        shares: Feasible starting allocation (e.g. from _greedy_allocate)
+        
+    Returns:
+        Array of non-negative integer share counts minimizing the squared error
+    """
+    n = p_hat.shape[0]
+    budget = 1.0 + 1e-9  # Same budget tolerance as _greedy_allocate
+    
+    best = shares.copy()
+    best_err = 0.0
+    for i in range(n):
+        best_err += (shares[i] * p_hat[i] - w_target[i]) ** 2
+    
+    # rem_w[k]: total target weight of assets k..n-1
+    rem_w = np.zeros(n + 1)
+    for k in range(n - 1, -1, -1):
+        rem_w[k] = rem_w[k + 1] + w_target[k]
+    
+    cur = np.zeros(n, dtype=np.int64)
+    hi = np.zeros(n, dtype=np.int64)
+    part = np.zeros(n + 1)   # error of assets 0..k-1
+    spent = np.zeros(n + 1)  # cost of assets 0..k-1
+    
+    k = 0
+    radius = np.sqrt(best_err)
+    cur[0] = max(0, int(np.ceil((w_target[0] - radius) / p_hat[0]))) - 1
+    hi[0] = min(int(np.floor((w_target[0] + radius) / p_hat[0])),
+                int(np.floor(budget / p_hat[0])))
+    while k >= 0:
+        cur[k] += 1
+        if cur[k] > hi[k]:
+            k -= 1
+            continue
+        err = part[k] + (cur[k] * p_hat[k] - w_target[k]) ** 2
+        if err >= best_err - 1e-15:
+            continue
+        cost = spent[k] + cur[k] * p_hat[k]
+        if k == n - 1:
+            best[:] = cur
+            best_err = err
+            continue
+        deficit = rem_w[k + 1] - (budget - cost)
+        if deficit > 0.0 and err + deficit * deficit / (n - k - 1) >= best_err - 1e-15:
+            continue
+        part[k + 1] = err
+        spent[k + 1] = cost
+        k += 1
+        radius = np.sqrt(best_err - err)
+        cur[k] = max(0, int(np.ceil((w_target[k] - radius) / p_hat[k]))) - 1
+        hi[k] = min(int(np.floor((w_target[k] + radius) / p_hat[k])),
+                    int(np.floor((budget - cost) / p_hat[k])))
+    
+    return best
+
+
+if njit is not None:
+    _greedy_allocate = njit(cache=_JIT_CACHE)(_greedy_allocate)
+    _refine_allocation = njit(cache=_JIT_CACHE)(_refine_allocation)
+
 
 def optimize_portfolio(
     total_amount: float,
@@ -49,48 +248,34 @@ def optimize_portfolio(
     w_target = np.array([target_weights[t] for t in tickers])
     p = np.array([prices[t] for t in tickers])
     
-    # Define decision variable: integer number of shares for each asset
-    shares = cp.Variable(n, integer=True)
-    
-    # Calculate actual weights based on shares and prices
-    # weight_i = (shares_i * price_i) / total_amount
-    # We use total_amount as the denominator for the target comparison
-    
-    # Objective: Minimize sum of squared errors between actual and target weights
-    # actual_weights = (shares * prices) / total_amount
-    actual_values = cp.multiply(shares, p)
-    actual_weights = actual_values / total_amount
+    # Pre-scale prices by the budget once: weight_i = shares_i * p_hat_i
+    p_hat = p / total_amount
     
-    # Squared error objective
-    objective = cp.Minimize(cp.sum_squares(actual_weights - w_target))
+    # Small portfolios: greedy start, then an exact bounded search, avoiding the MIQP solve
+    if n <= GREEDY_MAX_ASSETS:
+        w64 = w_target.astype(np.float64)
+        p64 = p_hat.astype(np.float64)
+        shares_value = _refine_allocation(w64, p64, _greedy_allocate(w64, p64))
+        return _summarize(tickers, shares_value, p, total_amount)
     
-    # Constraints:
-    # 1. Total cost cannot exceed available amount
-    # 2. Shares must be non-negative integers (already defined as integer variable)
-    # 3. Shares must be >= 0
-    
-    constraints = [
-        cp.sum(actual_values) <= total_amount,  # Cannot exceed budget
-        shares >= 0  # Non-negative shares
-    ]
-    
-    # Solve the problem
-    problem = cp.Problem(objective, constraints)
+    # Reuse the canonicalized problem for this size; only parameter values change
+    problem, shares, p_hat_param, w_param = _get_problem(n)
+    p_hat_param.value = p_hat
+    w_param.value = w_target
     
     # Use SCIP solver for mixed-integer quadratic programming
     try:
-        result = problem.solve(solver=cp.SCIP)
+        result = problem.solve(solver=cp.SCIP, warm_start=True, scip_params=SCIP_PARAMS)
         shares_value = np.array(shares.value).astype(int)
         shares_value = np.maximum(shares_value, 0)  # Ensure non-negative
     except Exception as e:
         print(f"Warning: SCIP solver failed ({e}). Using fallback method.")
         # Fallback: Relax integer constraint, solve, then round
         shares_relax = cp.Variable(n)
-        actual_values_relax = cp.multiply(shares_relax, p)
-        actual_weights_relax = actual_values_relax / total_amount
+        actual_weights_relax = cp.multiply(shares_relax, p_hat)
         objective_relax = cp.Minimize(cp.sum_squares(actual_weights_relax - w_target))
         constraints_relax = [
-            cp.sum(actual_values_relax) <= total_amount,
+            cp.sum(actual_weights_relax) <= 1,
             shares_relax >= 0
         ]
         problem_relax = cp.Problem(objective_relax, constraints_relax)
@@ -98,19 +283,23 @@ def optimize_portfolio(
         shares_value = np.round(shares_relax.value).astype(int)
         shares_value = np.maximum(shares_value, 0)  # Ensure non-negative
     
+    return _summarize(tickers, shares_value, p, total_amount)
+
+
+def _summarize(
+    tickers: list,
+    shares_value: np.ndarray,
+    p: np.ndarray,
+    total_amount: float
+) -> Tuple[Dict[str, int], float, float]:
+    """Build the (shares_dict, invested_amount, remaining_cash) result tuple."""
     # Calculate results
-    shares_dict = {ticker: int(shares_value[i]) for i, ticker in enumerate(tickers)}
+    shares_dict = dict(zip(tickers, shares_value.tolist()))
     
     # Calculate invested amount and remaining cash
-    invested_amount = sum(shares_dict[t] * prices[t] for t in tickers)
+    invested_amount = float(np.dot(shares_value, p))
     remaining_cash = total_amount - invested_amount
     
-    # Calculate actual weights
-    actual_weights_dict = {
-        t: (shares_dict[t] * prices[t]) / total_amount 
-        for t in tickers
-    }
-    
     return shares_dict, invested_amount, remaining_cash
 
 
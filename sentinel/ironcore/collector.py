@@ -3,7 +3,9 @@ import sqlite3
 import time
 import logging
 import os
-import sys
+import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,14 +15,22 @@ logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'ironcore.db')
 
+# (code, exchange) pairs; the exchange suffix is stored rather than derived per fetch
 CHINA_A_STOCKS = [
-    '600406',  # 国电南瑞
-    '002028',  # 思源电气
-    '002270',  # 华明装备
-    '688676',  # 金盘科技
-    '159326',  # 电网设备ETF
+    ('600406', 'SH'),  # 国电南瑞
+    ('002028', 'SZ'),  # 思源电气
+    ('002270', 'SZ'),  # 华明装备
+    ('688676', 'SH'),  # 金盘科技
+    ('159326', 'SZ'),  # 电网设备ETF
 ]
 
+# Same chart endpoint and browser User-Agent the Go sentinel uses
+YAHOO_CHART_URL = 'https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1d'
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
 US_ASSETS = [
     'SRVR',    # 全球数据中心REIT
     'DX-Y.NYB', # DXY
@@ -44,44 +54,27 @@ def init_db():
         CREATE INDEX IF NOT EXISTS idx_symbol_timestamp 
         ON market_data(symbol, timestamp)
     ''')
+    # WAL lets the Go dashboard read while we write, and NORMAL sync skips
+    # the per-commit fsync of the rollback journal
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
     conn.commit()
     return conn
 
-def try_import_efinance():
-    try:
-        import efinance
-        return efinance
-    except ImportError:
-        logger.warning("efinance not installed, installing...")
-        os.system(f"{sys.executable} -m pip install efinance -q")
-        try:
-            import efinance
-            return efinance
-        except ImportError:
-            logger.error("Failed to install efinance")
-            return None
-
-def try_import_yfinance():
+def _optional_import(name):
     try:
-        import yfinance
-        return yfinance
+        return importlib.import_module(name)
     except ImportError:
-        logger.warning("yfinance not installed, installing...")
-        os.system(f"{sys.executable} -m pip install yfinance -q")
-        try:
-            import yfinance
-            return yfinance
-        except ImportError:
-            logger.error("Failed to install yfinance")
-            return None
+        logger.error(f"{name} not installed (pip install -r requirements.txt), skipping its symbols")
+        return None
 
-def fetch_china_a_stock(efinance, symbol):
+def fetch_china_a_stock(efinance, symbol, exchange):
     try:
         df = efinance.stock.get_quote(symbol)
         if df is not None and not df.empty:
             latest = df.iloc[-1]
             return {
-                'symbol': f"{symbol}.SH" if symbol.startswith('6') else f"{symbol}.SZ",
+                'symbol': f"{symbol}.{exchange}",
                 'price': float(latest.get('最新价', 0)),
                 'volume': float(latest.get('成交量', 0))
             }
@@ -89,53 +82,65 @@ def fetch_china_a_stock(efinance, symbol):
         logger.error(f"Failed to fetch {symbol}: {e}")
     return None
 
-def fetch_us_asset(yfinance, symbol):
+async def fetch_us_asset(client, symbol):
     try:
-        ticker = yfinance.Ticker(symbol)
-        hist = ticker.history(period="1d")
-        if not hist.empty:
-            latest = hist.iloc[-1]
-            return {
-                'symbol': symbol,
-                'price': float(latest['Close']),
-                'volume': float(latest['Volume'])
-            }
+        resp = await client.get(YAHOO_CHART_URL.format(symbol=symbol))
+        resp.raise_for_status()
+        quote = resp.json()['chart']['result'][0]['indicators']['quote'][0]
+        return {
+            'symbol': symbol,
+            'price': float(quote['close'][-1]),
+            'volume': float(quote['volume'][-1] or 0)  # indices such as ^VIX report no volume
+        }
     except Exception as e:
         logger.error(f"Failed to fetch {symbol}: {e}")
     return None
 
+async def fetch_us_assets(httpx, symbols):
+    # One HTTP/2 connection multiplexes every symbol's request
+    async with httpx.AsyncClient(http2=True, headers=HTTP_HEADERS, timeout=30) as client:
+        return await asyncio.gather(*(fetch_us_asset(client, s) for s in symbols))
+
 def save_to_db(conn, data_list):
-    cursor = conn.cursor()
     timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-    for data in data_list:
-        if data:
-            cursor.execute(
-                'INSERT INTO market_data (timestamp, symbol, price, volume) VALUES (?, ?, ?, ?)',
-                (timestamp, data['symbol'], data.get('price'), data.get('volume'))
-            )
-    conn.commit()
-    logger.info(f"Saved {len(data_list)} records to DB")
+    rows = [
+        (timestamp, data['symbol'], data.get('price'), data.get('volume'))
+        for data in data_list if data
+    ]
+    with conn:
+        conn.executemany(
+            'INSERT INTO market_data (timestamp, symbol, price, volume) VALUES (?, ?, ?, ?)',
+            rows
+        )
+    logger.info(f"Saved {len(rows)} records to DB")
 
-def run_collection():
+def run_collection(efinance, httpx):
     logger.info("Starting data collection...")
     
     conn = init_db()
     
-    efinance = try_import_efinance()
-    yfinance = try_import_yfinance()
-    
     all_data = []
     
-    if efinance:
-        for symbol in CHINA_A_STOCKS:
-            data = fetch_china_a_stock(efinance, symbol)
-            if data:
-                logger.info(f"Fetched {data['symbol']}: price={data['price']}, volume={data['volume']}")
-                all_data.append(data)
-    
-    if yfinance:
-        for symbol in US_ASSETS:
-            data = fetch_us_asset(yfinance, symbol)
+    # Each efinance fetch is a blocking HTTP request, so run them concurrently;
+    # the US quotes share one async client running in its own worker
+    with ThreadPoolExecutor(max_workers=len(CHINA_A_STOCKS) + 1) as executor:
+        china_futures = []
+        if efinance:
+            china_futures = [
+                executor.submit(fetch_china_a_stock, efinance, code, exchange)
+                for code, exchange in CHINA_A_STOCKS
+            ]
+        us_future = executor.submit(asyncio.run, fetch_us_assets(httpx, US_ASSETS)) if httpx else None
+        
+        results = [f.result() for f in china_futures]
+        if us_future:
+            # A batch-level failure (e.g. httpx installed without h2) must not drop the A-share rows
+            try:
+                results += us_future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch US assets: {e}")
+        
+        for data in results:
             if data:
                 logger.info(f"Fetched {data['symbol']}: price={data['price']}, volume={data['volume']}")
                 all_data.append(data)
@@ -152,9 +157,13 @@ def main():
     interval = int(os.environ.get('COLLECT_INTERVAL', 600))
     logger.info(f"Collector starting with {interval}s interval")
     
+    # Resolve optional dependencies once, not on every tick
+    efinance = _optional_import('efinance')
+    httpx = _optional_import('httpx')
+    
     while True:
         try:
-            run_collection()
+            run_collection(efinance, httpx)
         except Exception as e:
             logger.error(f"Collection error: {e}")
         
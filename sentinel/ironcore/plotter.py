@@ -1,11 +1,19 @@
 import sys
-import json
+import matplotlib
+matplotlib.use('Agg')  # headless: only ever renders to a PNG, skip GUI backend probing
 import matplotlib.pyplot as plt
 import numpy as np
 
+plt.ioff()
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional; stdlib json also accepts bytes
+    from json import loads as json_loads
+
 def main():
     try:
-        data = json.loads(sys.stdin.read())
+        data = json_loads(sys.stdin.buffer.read())
         
         if 'corrs6m' not in data:
             print("Missing corrs6m data", file=sys.stderr)
@@ -28,17 +36,19 @@ def main():
         
         fig, ax = plt.subplots(figsize=(12, 7))
         
-        ax.bar(x - width/2, values6m, width, label='6mo Baseline', color='#87CEEB')
+        bars6m = ax.bar(x - width/2, values6m, width, label='6mo Baseline', color='#87CEEB')
         
-        colors30 = []
-        for i, v30 in enumerate(values30):
-            v6m = values6m[i]
-            if v30 < -0.6 or v30 < (v6m - 0.2):
-                colors30.append('#FF4500')
-            else:
-                colors30.append('#4682B4')
+        # Flag 30d bars that broke below -0.6 or dropped more than 0.2 from the 6mo baseline
+        v6m = np.asarray(values6m, dtype=float)
+        v30 = np.asarray(values30, dtype=float)
+        alert = (v30 < -0.6) | (v30 < v6m - 0.2)
+        colors30 = np.where(alert, '#FF4500', '#4682B4').tolist()
         
-        ax.bar(x + width/2, values30, width, label='30d Current', color=colors30)
+        bars30 = ax.bar(x + width/2, values30, width, label='30d Current', color=colors30)
+        
+        # Output is a PNG anyway; rasterizing keeps any vector export from carrying one path per bar
+        for patch in (*bars6m, *bars30):
+            patch.set_rasterized(True)
         
         ax.axhline(y=-0.7, color='red', linestyle='--', linewidth=1.5)
         
@@ -50,20 +60,11 @@ def main():
         ax.set_ylim(-1, 1)
         ax.grid(axis='y', linestyle='--', alpha=0.7)
         
-        for i, v in enumerate(values6m):
-            ax.annotate(f'{v:.3f}', 
-                       xy=(x[i] - width/2, v),
-                       xytext=(0, -10 if v < 0 else 3),
-                       textcoords='offset points',
-                       ha='center', va='top' if v < 0 else 'bottom', fontsize=8)
-        
-        for i, v in enumerate(values30):
-            if v != 0:
-                ax.annotate(f'{v:.3f}', 
-                           xy=(x[i] + width/2, v),
-                           xytext=(0, -10 if v < 0 else 3),
-                           textcoords='offset points',
-                           ha='center', va='top' if v < 0 else 'bottom', fontsize=8)
+        # One labelling pass per bar container; bar_label flips negative labels below the bar
+        ax.bar_label(bars6m, labels=[f'{v:.3f}' for v in values6m], padding=3, fontsize=8)
+        # Assets without a 30d value are plotted as 0 and left unlabelled
+        ax.bar_label(bars30, labels=[f'{v:.3f}' if v != 0 else '' for v in values30],
+                     padding=3, fontsize=8)
         
         vix_color = 'red' if vix_dxy_corr > 0.5 else 'green'
         props = dict(boxstyle='round', facecolor='wheat', alpha=0.8)
@@ -76,8 +77,9 @@ def main():
                     transform=ax.transAxes, fontsize=9, verticalalignment='top',
                     color='red', fontweight='bold')
         
-        plt.tight_layout()
-        plt.savefig("audit_chart.png")
+        fig.tight_layout()
+        fig.savefig("audit_chart.png", dpi=100, bbox_inches='tight', pil_kwargs={'optimize': True})
+        plt.close(fig)
     except Exception as e:
         print(f"Plotting error: {e}", file=sys.stderr)
 
@@ -1,37 +1,68 @@
 import yfinance as yf
 import pandas as pd
+import os
 import sys
 
+try:
+    from strategy_lab.market_data import parquet_cache
+except ImportError:  # run as a script from inside strategy_lab/
+    from market_data import parquet_cache
+
 # Configuration
 TICKERS = ["DX-Y.NYB", "600406.SS", "002028.SZ", "002270.SZ", "688676.SS", "159326.SZ"]
 START_DATE = "2021-01-01"
 END_DATE = "2026-02-22"
 
+# Output column order (matches the CSV header read by backtest.go)
+COLUMNS = ["Date", "Ticker", "Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+# Columnar copy of the same rows for Python consumers: pd.read_parquet(PARQUET_PATH, columns=[...])
+PARQUET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prices.parquet")
+
+
+@parquet_cache
+def download_prices(tickers: list[str], start_date: str, end_date: str) -> pd.DataFrame:
+    """One concurrent request for all tickers instead of one round-trip each."""
+    return yf.download(tickers, start=start_date, end=end_date, group_by="ticker",
+                       threads=True, progress=False)
+
+
 if __name__ == "__main__":
     print("Date,Ticker,Open,High,Low,Close,AdjClose,Volume")
+    try:
+        all_data = download_prices(TICKERS, START_DATE, END_DATE)
+    except Exception as e:
+        for ticker in TICKERS:
+            print(f"Error {ticker}: {e}", file=sys.stderr)
+        all_data = pd.DataFrame()
+    frames = []
     for ticker in TICKERS:
         try:
-            data = yf.download(ticker, start=START_DATE, end=END_DATE, progress=False)
-            if data.empty: continue
+            if all_data.empty or ticker not in all_data.columns.get_level_values(0):
+                continue
             
-            # Fix columns
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = data.columns.droplevel(1)
+            # Dates are the union across markets; drop days this ticker did not trade
+            data = all_data[ticker].dropna(how="all")
+            if data.empty: continue
             
             data = data.reset_index() # Turns index into 'Date' column
+            data["Ticker"] = ticker
+            if "Adj Close" not in data.columns:
+                data["Adj Close"] = data["Close"]
+            # The union-of-calendars NaNs make the batched Volume float; emit integers as before
+            data["Volume"] = data["Volume"].round().astype("Int64")
             
-            for i in range(len(data)):
-                date = data.iloc[i]['Date']
-                date_str = date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else str(date)[:10]
-                
-                open_p = data.iloc[i]['Open']
-                high_p = data.iloc[i]['High']
-                low_p = data.iloc[i]['Low']
-                close_p = data.iloc[i]['Close']
-                adj_p = data.iloc[i]['Adj Close'] if 'Adj Close' in data.columns else close_p
-                vol = data.iloc[i]['Volume']
-                
-                print(f"{date_str},{ticker},{open_p},{high_p},{low_p},{close_p},{adj_p},{vol}")
+            frames.append(data[COLUMNS])
                 
         except Exception as e:
             print(f"Error {ticker}: {e}", file=sys.stderr)
+
+    if frames:
+        prices = pd.concat(frames, ignore_index=True)
+        # backtest.go still streams CSV from stdout; write the whole frame at once
+        prices.to_csv(sys.stdout, header=False, index=False,
+                      date_format="%Y-%m-%d", na_rep="nan")
+        try:
+            prices.to_parquet(PARQUET_PATH, compression="zstd", index=False)
+        except Exception as e:
+            print(f"Warning: could not write {PARQUET_PATH}: {e}", file=sys.stderr)
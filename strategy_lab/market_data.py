@@ -0,0 +1,78 @@
+# strategy_lab/market_data.py
+"""
+Market Data Helpers
+
+Shared helpers for modules that download price history from Yahoo Finance.
+"""
+
+import functools
+import hashlib
+import os
+import time
+
+import pandas as pd
+
+
+CACHE_DIR = os.path.expanduser("~/.cache/finance")
+CACHE_TTL_SECONDS = 24 * 60 * 60  # refresh after one trading day
+
+
+def _normalize(value):
+    """Make list arguments order-insensitive so ticker permutations share a cache entry."""
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted(value))
+    return value
+
+
+def _is_incomplete(prices: pd.DataFrame) -> bool:
+    """
+    Whether a price download looks failed: no rows, or a ticker column with no prices.
+    
+    yf.download keeps a failed ticker as an all-NaN column instead of raising.
+    """
+    return prices.empty or bool(prices.isna().all().any())
+
+
+def parquet_cache(func):
+    """
+    Cache a DataFrame-returning fetch function on disk as Parquet.
+
+    The cache key is an MD5 hash of the function name and its arguments.
+    Entries older than CACHE_TTL_SECONDS (by file mtime) are refetched.
+    Results that look like a failed fetch (see _is_incomplete) are never
+    cached, so the next run retries them.
+
+    Args:
+        func: Function returning a pandas DataFrame
+
+    Returns:
+        Wrapped function with the same signature
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key_args = (
+            func.__name__,
+            tuple(_normalize(a) for a in args),
+            tuple(sorted((k, _normalize(v)) for k, v in kwargs.items())),
+        )
+        key = hashlib.md5(repr(key_args).encode("utf-8")).hexdigest()
+        path = os.path.join(CACHE_DIR, f"{key}.parquet")
+
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < CACHE_TTL_SECONDS:
+            try:
+                return pd.read_parquet(path)
+            except Exception as e:
+                print(f"Warning: could not read cache {path} ({e}), refetching.")
+
+        data = func(*args, **kwargs)
+
+        if isinstance(data, pd.DataFrame) and not _is_incomplete(data):
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                data.to_parquet(path)
+            except Exception as e:
+                print(f"Warning: could not write cache {path} ({e}).")
+
+        return data
+
+    return wrapper
@@ -10,11 +10,28 @@ import yfinance as yf
 import numpy as np
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels then fall back to their *_numpy versions
+    njit = None
 
+# Only cache compiled kernels when imported: the on-disk cache records the module
+# name, so entries written under __main__ and under the package name would clash
+_JIT_CACHE = __name__ != "__main__"
+
+try:
+    from strategy_lab.market_data import parquet_cache
+except ImportError:  # run as a script from inside strategy_lab/
+    from market_data import parquet_cache
+
+
+@parquet_cache
 def fetch_data(tickers: list[str], start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetch historical price data for given tickers.
     
+    Results are cached on disk as Parquet for one trading day.
+    
     Args:
         tickers: List of ticker symbols
         start_date: Start date for data fetch
@@ -39,19 +56,130 @@ def fetch_data(tickers: list[str], start_date: str, end_date: str) -> pd.DataFra
     return data
 
 
-def calculate_annualized_volatility(returns: pd.Series) -> float:
+def calculate_annualized_volatility(prices: pd.DataFrame) -> float:
+    """
+    Calculate annualized volatility from daily prices.
+    
+    Simple returns are taken directly on the ndarray (np.diff(p) / p[:-1]),
+    matching pct_change without building an intermediate frame.
+    
+    Args:
+        prices: DataFrame (or Series) of daily prices, one column per asset
+        
+    Returns:
+        Annualized volatility as a float, averaged across columns
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    returns = np.diff(values, axis=0) / values[:-1]
+    daily_volatility = np.nanstd(returns, axis=0, ddof=1)
+    annualized_volatility = daily_volatility.mean() * np.sqrt(252)
+    return float(annualized_volatility)
+
+
+def _max_drawdown(prices: np.ndarray) -> float:
+    """
+    Single-pass maximum drawdown over a float64 price array.
+    
+    Tracks the running peak and the worst drawdown from it; NaN prices are skipped.
+    
+    Args:
+        prices: 1-D array of prices
+        
+    Returns:
+        Maximum drawdown as a negative float, or NaN if there are no prices
+    """
+    peak = np.nan
+    worst = 0.0
+    for i in range(prices.shape[0]):
+        price = prices[i]
+        if np.isnan(price):
+            continue
+        if np.isnan(peak) or price > peak:
+            peak = price
+        drawdown = price / peak - 1.0
+        if drawdown < worst:
+            worst = drawdown
+    if np.isnan(peak):
+        return np.nan
+    return worst
+
+
+def _max_drawdown_numpy(prices: np.ndarray) -> float:
+    """Vectorized equivalent of _max_drawdown: running peak via np.maximum.accumulate."""
+    prices = prices[~np.isnan(prices)]
+    if prices.shape[0] == 0:
+        return np.nan
+    peak = np.maximum.accumulate(prices)
+    return (prices / peak - 1.0).min()
+
+
+if njit is not None:
+    _max_drawdown = njit(cache=_JIT_CACHE)(_max_drawdown)
+else:
+    _max_drawdown = _max_drawdown_numpy
+
+
+def _vol_mdd(prices: np.ndarray, returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """
-    Calculate annualized volatility from daily returns.
+    Annualized volatility and maximum drawdown per column in one forward scan.
+    
+    Each step loads one return, feeding a running (Welford) variance, and one
+    price, updating the running peak and worst drawdown; NaN prices are skipped.
+    Returns are taken as given so volatility matches the aligned returns used
+    elsewhere (e.g. for beta), whatever NaN policy produced them.
     
     Args:
-        returns: Series of daily returns
+        prices: 2-D float32 or float64 array, one column per ticker
+        returns: 2-D array of aligned daily returns with the same columns
         
     Returns:
-        Annualized volatility as a float
+        (volatility, mdd) arrays with one entry per column
     """
-    daily_volatility = returns.std()
-    annualized_volatility = daily_volatility * np.sqrt(252)
-    return annualized_volatility
+    n_prices, n_cols = prices.shape
+    n_returns = returns.shape[0]
+    volatility = np.empty(n_cols)
+    mdd = np.empty(n_cols)
+    for j in range(n_cols):
+        mean = 0.0
+        m2 = 0.0
+        peak = np.nan
+        worst = 0.0
+        for i in range(max(n_prices, n_returns)):
+            if i < n_returns:
+                r = returns[i, j]
+                delta = r - mean
+                mean += delta / (i + 1)
+                m2 += delta * (r - mean)
+            if i >= n_prices:
+                continue
+            price = prices[i, j]
+            if np.isnan(price):
+                continue
+            if np.isnan(peak) or price > peak:
+                peak = price
+            drawdown = price / peak - 1.0
+            if drawdown < worst:
+                worst = drawdown
+        volatility[j] = np.sqrt(m2 / (n_returns - 1)) * np.sqrt(252) if n_returns > 1 else np.nan
+        mdd[j] = worst if not np.isnan(peak) else np.nan
+    return volatility, mdd
+
+
+def _vol_mdd_numpy(prices: np.ndarray, returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized equivalent of _vol_mdd using column-wise NumPy reductions."""
+    volatility = returns.std(axis=0, ddof=1) * np.sqrt(252)
+    # fmax carries the peak over NaN gaps; fmin skips the NaN drawdowns they leave
+    with np.errstate(invalid='ignore'):
+        drawdowns = prices / np.fmax.accumulate(prices, axis=0) - 1.0
+    return volatility, np.fmin.reduce(drawdowns, axis=0)
+
+
+if njit is not None:
+    _vol_mdd = njit(cache=_JIT_CACHE)(_vol_mdd)
+else:
+    _vol_mdd = _vol_mdd_numpy
 
 
 def calculate_maximum_drawdown(prices: pd.Series) -> float:
@@ -59,22 +187,18 @@ def calculate_maximum_drawdown(prices: pd.Series) -> float:
     Calculate Maximum Drawdown (MDD) from price series.
     
     Args:
-        prices: Series of prices
+        prices: Series of prices (a single-column DataFrame is also accepted)
         
     Returns:
         Maximum drawdown as a negative float (e.g., -0.25 for 25% drawdown)
     """
-    # Calculate cumulative returns
-    cumulative_returns = (1 + prices.pct_change()).cumprod()
-    
-    # Calculate running maximum
-    running_max = cumulative_returns.expanding(min_periods=1).max()
+    values = np.asarray(prices, dtype=np.float64)
+    if values.ndim == 2 and values.shape[1] == 1:
+        values = values[:, 0]
+    if values.ndim != 1:
+        raise ValueError("calculate_maximum_drawdown expects a single price series")
     
-    # Calculate drawdown
-    drawdown = (cumulative_returns - running_max) / running_max
-    
-    # Return minimum (most negative) drawdown
-    return drawdown.min()
+    return float(_max_drawdown(values))
 
 
 def calculate_beta(asset_returns: pd.Series, benchmark_returns: pd.Series) -> float:
@@ -135,8 +259,13 @@ def calculate_risk_metrics(
         print("Failed to fetch data.")
         return pd.DataFrame()
     
+    # float32 halves memory traffic; results are only displayed to 2 decimals
+    price_data = price_data.astype(np.float32)
+    
     # Calculate returns for all assets
     returns_data = price_data.pct_change().dropna()
+    # Rows with any gap are gone, so per-ticker slices need no further dropna
+    assert not returns_data.isna().to_numpy().any()
     
     # Get benchmark returns
     if benchmark_ticker in returns_data.columns:
@@ -145,50 +274,42 @@ def calculate_risk_metrics(
         print(f"Warning: Benchmark {benchmark_ticker} not found in data.")
         benchmark_returns = pd.Series()
     
-    # Calculate metrics for each ticker
-    results = []
-    
+    # Calculate metrics for all tickers at once with column-wise reductions
+    available = [t for t in tickers if t in price_data.columns]
     for ticker in tickers:
         if ticker not in price_data.columns:
             print(f"Warning: Data not found for {ticker}")
-            continue
-        
-        try:
-            # Get price and return series for this ticker
-            prices = price_data[ticker].dropna()
-            ticker_returns = returns_data[ticker].dropna()
-            
-            # Calculate metrics
-            volatility = calculate_annualized_volatility(ticker_returns)
-            mdd = calculate_maximum_drawdown(prices)
-            
-            # Calculate beta if benchmark data is available
-            if not benchmark_returns.empty:
-                beta = calculate_beta(ticker_returns, benchmark_returns)
-            else:
-                beta = np.nan
-            
-            results.append({
-                'Ticker': ticker,
-                'Volatility': volatility,
-                'MDD': mdd,
-                'Beta': beta
-            })
-            
-        except Exception as e:
-            print(f"Error calculating metrics for {ticker}: {e}")
-            continue
     
-    # Create DataFrame and sort by Volatility (descending)
-    results_df = pd.DataFrame(results)
+    prices = price_data[available]
+    returns = returns_data[available]
     
-    if not results_df.empty:
-        results_df = results_df.sort_values('Volatility', ascending=False).reset_index(drop=True)
-        
-        # Format numeric columns
-        results_df['Volatility'] = results_df['Volatility'].apply(lambda x: f"{x:.2%}")
-        results_df['MDD'] = results_df['MDD'].apply(lambda x: f"{x:.2%}")
-        results_df['Beta'] = results_df['Beta'].apply(lambda x: f"{x:.2f}" if not pd.isna(x) else "N/A")
+    # Volatility over the jointly aligned returns and MDD from each ticker's own
+    # running peak, fused into one scan over the (column-major) price and return matrices
+    volatility, mdd = _vol_mdd(np.asfortranarray(prices.to_numpy(dtype=np.float32)),
+                               np.asfortranarray(returns.to_numpy(dtype=np.float32)))
+    
+    # Calculate beta if benchmark data is available: all covariances in one gemv
+    n_obs = len(benchmark_returns)
+    if n_obs < 2:
+        beta = np.full(len(available), np.nan)
+    else:
+        bench_c = benchmark_returns.to_numpy() - benchmark_returns.to_numpy().mean()
+        variance = bench_c @ bench_c / (n_obs - 1)
+        if variance == 0:
+            beta = np.full(len(available), np.nan)
+        else:
+            R = returns.to_numpy()
+            cov = (R - R.mean(axis=0)).T @ bench_c / (n_obs - 1)
+            beta = cov / variance
+    
+    # Sort the metric arrays by Volatility (descending, NaN last) and build the DataFrame once
+    order = np.argsort(-volatility, kind='stable')
+    results_df = pd.DataFrame({
+        'Ticker': [available[i] for i in order],
+        'Volatility': [f"{x:.2%}" for x in volatility[order]],
+        'MDD': [f"{x:.2%}" for x in mdd[order]],
+        'Beta': [f"{x:.2f}" if not np.isnan(x) else "N/A" for x in beta[order]]
+    })
     
     return results_df
 
@@ -6,14 +6,17 @@ import numpy as np
 
 def update_weights(current_weights: pd.Series, losses: pd.Series, epsilon: float) -> pd.Series:
     """Updates the weights using the multiplicative weights update (MWU) algorithm."""
-    # Calculate the updated weights
-    updated_weights = current_weights * np.exp(-epsilon * losses)
+    # Work in log space so large epsilon * losses cannot overflow or underflow exp
+    with np.errstate(divide="ignore"):  # zero weights map to -inf and stay at zero
+        log_weights = np.log(current_weights.to_numpy(dtype=np.float64))
+    log_weights -= epsilon * losses.reindex(current_weights.index).to_numpy(dtype=np.float64)
+    log_weights -= log_weights.max()
 
     # Normalize the weights to sum to 1
-    updated_weights = updated_weights / updated_weights.sum()
-
-    return updated_weights
+    updated_weights = np.exp(log_weights)
+    updated_weights /= updated_weights.sum()
 
+    return pd.Series(updated_weights, index=current_weights.index)
 
 if __name__ == "__main__":
     # Example usage
@@ -1,11 +1,25 @@
+import atexit
 import os
 import smtplib
+import sys
 import yfinance as yf
 import pandas as pd
 import numpy as np
 from email.mime.text import MIMEText
 from email.header import Header
 
+try:
+    from strategy_lab.market_data import parquet_cache
+except ImportError:  # 直接运行 python3 tests/risk_profiler.py 时 sys.path[0] 为 tests/，补上仓库根目录
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from strategy_lab.market_data import parquet_cache
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba 为可选依赖，缺失时使用 NumPy 向量化实现
+    njit = None
+    prange = range
+
 # --- 核心配置（建议在服务器环境变量中设置） ---
 SMTP_HOST = "smtp.163.com"
 SMTP_PORT = 465  # SSL 端口
@@ -13,6 +27,32 @@ SMTP_USER = os.getenv("SMTP_USER")      # 你的163邮箱地址
 SMTP_PASS = os.getenv("SMTP_PASS")      # 163邮箱的“授权码”（非登录密码）
 RECEIVER_EMAIL = os.getenv("RECEIVER_EMAIL") # 接收报告的邮箱
 
+_smtp = None
+
+def _get_smtp():
+    """复用已登录的 SMTP_SSL 连接，连接失效时惰性重连，省去每封邮件的 TLS 握手"""
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        _smtp = None
+    server = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT)
+    server.login(SMTP_USER, SMTP_PASS)
+    _smtp = server
+    return server
+
+@atexit.register
+def _close_smtp():
+    """进程退出时关闭复用的连接"""
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+
 def send_email_report(subject, content):
     """通过 163 SMTP 发送分析报告"""
     try:
@@ -21,20 +61,97 @@ def send_email_report(subject, content):
         message['To'] = RECEIVER_EMAIL
         message['Subject'] = Header(subject, 'utf-8')
 
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, [RECEIVER_EMAIL], message.as_string())
+        _get_smtp().sendmail(SMTP_USER, [RECEIVER_EMAIL], message.as_string())
         print("✅ 审计报告已发送至邮箱。")
     except Exception as e:
         print(f"❌ 邮件发送失败: {e}")
 
+@parquet_cache
+def fetch_close_prices(tickers, period, interval):
+    """获取收盘价（本地 Parquet 缓存一个交易日）"""
+    return yf.download(tickers, period=period, interval=interval)['Close']
+
+def pearson_corr_with(matrix, ref):
+    """
+    单次遍历计算矩阵每一列与参考序列的 Pearson 相关系数
+
+    c = (nΣxy - ΣxΣy) / sqrt((nΣx² - (Σx)²)(nΣy² - (Σy)²))
+    五个求和量各扫描一次数据，无需为每一列重新计算均值。
+    """
+    n = ref.shape[0]
+    sx = matrix.sum(axis=0)
+    sy = ref.sum()
+    sxx = (matrix * matrix).sum(axis=0)
+    syy = ref @ ref
+    sxy = ref @ matrix
+    return (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+
+def vol_mdd_columns(returns):
+    """逐列计算年化波动率与基于累计净值的最大回撤（NumPy 实现）"""
+    vol = returns.std(axis=0, ddof=1) * np.sqrt(252)
+    cum_rets = np.cumprod(1 + returns, axis=0)
+    mdd = (cum_rets / np.maximum.accumulate(cum_rets, axis=0) - 1).min(axis=0)
+    return vol, mdd
+
+def _pearson_corr_parallel(matrix, ref):
+    """与 pearson_corr_with 相同的求和公式，按列 prange 并行，每列只扫描一次"""
+    n, m = matrix.shape
+    out = np.empty(m)
+    for j in prange(m):
+        sx = 0.0
+        sy = 0.0
+        sxx = 0.0
+        syy = 0.0
+        sxy = 0.0
+        for i in range(n):
+            x = matrix[i, j]
+            y = ref[i]
+            sx += x
+            sy += y
+            sxx += x * x
+            syy += y * y
+            sxy += x * y
+        out[j] = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    return out
+
+def _vol_mdd_parallel(returns):
+    """与 vol_mdd_columns 等价，按列 prange 并行"""
+    n, m = returns.shape
+    vol = np.empty(m)
+    mdd = np.empty(m)
+    for j in prange(m):
+        mean = 0.0
+        for i in range(n):
+            mean += returns[i, j]
+        mean /= n
+        var = 0.0
+        cum = 1.0
+        peak = -np.inf
+        worst = 0.0
+        for i in range(n):
+            r = returns[i, j]
+            var += (r - mean) * (r - mean)
+            cum *= 1.0 + r
+            if cum > peak:
+                peak = cum
+            dd = cum / peak - 1.0
+            if dd < worst:
+                worst = dd
+        vol[j] = np.sqrt(var / (n - 1)) * np.sqrt(252)
+        mdd[j] = worst
+    return vol, mdd
+
+if njit is not None:
+    pearson_corr_with = njit(parallel=True, cache=True)(_pearson_corr_parallel)
+    vol_mdd_columns = njit(parallel=True, cache=True)(_vol_mdd_parallel)
+
 def analyze_risk_and_correlation():
     # 你的核心美元资产
     assets = ["AMD", "SLV", "USO", "GLD", "IWY", "SRVR"]
     dxy_ticker = "DX-Y.NYB"
     
     # 获取数据
-    data = yf.download(assets + [dxy_ticker], period="6mo", interval="1d")['Close']
+    data = fetch_close_prices(assets + [dxy_ticker], period="6mo", interval="1d")
     returns = data.pct_change().dropna()
 
     report_lines = ["--- Beacon 系统资产审计报告 ---", f"日期: {pd.Timestamp.now()}\n"]
@@ -42,8 +159,11 @@ def analyze_risk_and_correlation():
 
     # 1. 计算各资产与美元的相关性
     report_lines.append("【美元相关性审计】")
-    for asset in assets:
-        corr = returns[asset].corr(returns[dxy_ticker])
+    corrs = pearson_corr_with(
+        returns[assets].to_numpy(dtype=np.float64),
+        returns[dxy_ticker].to_numpy(dtype=np.float64)
+    )
+    for asset, corr in zip(assets, corrs):
         status = "⚠️ 强相关" if corr < -0.6 else "🟢 独立运动"
         report_lines.append(f"{asset} vs DXY: {corr:.4f} ({status})")
         
@@ -53,11 +173,8 @@ def analyze_risk_and_correlation():
 
     # 2. 计算风险指标 (Volatility & MDD)
     report_lines.append("\n【资产风险体检】")
-    for asset in assets:
-        vol = returns[asset].std() * np.sqrt(252)
-        # 计算 MDD
-        cum_rets = (1 + returns[asset]).cumprod()
-        mdd = ((cum_rets - cum_rets.expanding().max()) / cum_rets.expanding().max()).min()
+    vols, mdds = vol_mdd_columns(np.ascontiguousarray(returns[assets].to_numpy(dtype=np.float64)))
+    for asset, vol, mdd in zip(assets, vols, mdds):
         report_lines.append(f"{asset}: Vol={vol:.2%}, MDD={mdd:.2%}")
 
     content = "\n".join(report_lines)
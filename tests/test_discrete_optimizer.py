@@ -0,0 +1,90 @@
+import contextlib
+import io
+import itertools
+import os
+import runpy
+import unittest
+import numpy as np
+from execution_layer import discrete_optimizer
+from execution_layer.discrete_optimizer import optimize_portfolio
+
+def _squared_error(shares, prices, total_amount, target_weights):
+    return sum((shares[t] * prices[t] / total_amount - w) ** 2 for t, w in target_weights.items())
+
+def _brute_force(total_amount, target_weights, prices):
+    """Exhaustive search over every affordable allocation (small cases only)."""
+    tickers = list(target_weights)
+    ranges = [range(int(total_amount // prices[t]) + 1) for t in tickers]
+    best_error = np.inf
+    for counts in itertools.product(*ranges):
+        shares = dict(zip(tickers, counts))
+        if sum(shares[t] * prices[t] for t in tickers) > total_amount:
+            continue
+        best_error = min(best_error, _squared_error(shares, prices, total_amount, target_weights))
+    return best_error
+
+class TestDiscreteOptimizer(unittest.TestCase):
+
+    def test_example_allocation(self):
+        target_weights = {'USO': 0.4, 'GLD': 0.6}
+        prices = {'USO': 85.50, 'GLD': 185.25}
+
+        shares_dict, invested_amount, remaining_cash = optimize_portfolio(10000.0, target_weights, prices)
+
+        self.assertEqual(shares_dict, {'USO': 47, 'GLD': 32})
+        self.assertAlmostEqual(invested_amount, 9946.5, places=6)
+        self.assertAlmostEqual(remaining_cash, 53.5, places=6)
+
+    def test_main_example_runs(self):
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            runpy.run_path(os.path.abspath(discrete_optimizer.__file__), run_name='__main__')
+        self.assertIn("Sum of Squared Errors: 0.00005526", buf.getvalue())
+
+    def test_coarse_allocation_is_optimal(self):
+        # Greedy alone stops at (0, 11, 1) with twice the optimal error
+        target_weights = {'A': 0.015, 'B': 0.427, 'C': 0.558}
+        prices = {'A': 346.58, 'B': 55.43, 'C': 481.1}
+
+        shares_dict, _, _ = optimize_portfolio(1460.0, target_weights, prices)
+
+        self.assertEqual(shares_dict, {'A': 0, 'B': 8, 'C': 2})
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            n = int(rng.integers(2, 4))
+            weights = rng.dirichlet(np.ones(n))
+            tickers = [f"T{i}" for i in range(n)]
+            target_weights = dict(zip(tickers, weights))
+            total_amount = float(rng.uniform(500, 3000))
+            prices = dict(zip(tickers, rng.uniform(0.02, 0.4, n) * total_amount))
+
+            shares_dict, invested_amount, remaining_cash = optimize_portfolio(total_amount, target_weights, prices)
+
+            self.assertLessEqual(invested_amount, total_amount + 1e-6)
+            self.assertGreaterEqual(remaining_cash, -1e-6)
+            self.assertTrue(all(s >= 0 for s in shares_dict.values()))
+            self.assertAlmostEqual(
+                _squared_error(shares_dict, prices, total_amount, target_weights),
+                _brute_force(total_amount, target_weights, prices),
+                places=10
+            )
+
+    def test_budget_never_exceeded(self):
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            n = int(rng.integers(2, 17))
+            tickers = [f"T{i}" for i in range(n)]
+            target_weights = dict(zip(tickers, rng.dirichlet(np.ones(n))))
+            prices = dict(zip(tickers, rng.uniform(5, 500, n)))
+            total_amount = float(rng.uniform(1000, 50000))
+
+            shares_dict, invested_amount, remaining_cash = optimize_portfolio(total_amount, target_weights, prices)
+
+            self.assertLessEqual(invested_amount, total_amount + 1e-6)
+            self.assertAlmostEqual(invested_amount + remaining_cash, total_amount, places=6)
+            self.assertTrue(all(s >= 0 for s in shares_dict.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
+from unittest import mock
 import pandas as pd
 import numpy as np
-from strategy_lab.risk_profiler import calculate_annualized_volatility, calculate_maximum_drawdown, calculate_beta
+from strategy_lab.risk_profiler import calculate_annualized_volatility, calculate_maximum_drawdown, calculate_beta, calculate_risk_metrics
 
 class TestRiskProfiler(unittest.TestCase):
 
@@ -15,6 +16,19 @@ class TestRiskProfiler(unittest.TestCase):
         mdd = calculate_maximum_drawdown(data)
         self.assertAlmostEqual(mdd, -0.3333, places=4)
 
+    def test_calculate_maximum_drawdown_from_first_price(self):
+        # The first price counts as a peak, so an immediate fall is a drawdown
+        data = pd.DataFrame([2, 1, 1.5])
+        mdd = calculate_maximum_drawdown(data)
+        self.assertAlmostEqual(mdd, -0.5, places=4)
+
+    def test_calculate_risk_metrics_mdd_from_first_price(self):
+        prices = pd.DataFrame({"AMD": [2, 1, 1.5], "^GSPC": [1, 1.1, 1.2]},
+                              index=pd.bdate_range("2024-01-01", periods=3))
+        with mock.patch("strategy_lab.risk_profiler.fetch_data", return_value=prices):
+            results = calculate_risk_metrics(["AMD"])
+        self.assertEqual(results.loc[0, "MDD"], "-50.00%")
+
     def test_calculate_beta(self):
         asset_returns = pd.Series([0.01, 0.02, 0.03, 0.04, 0.05])
         benchmark_returns = pd.Series([0.005, 0.01, 0.015, 0.02, 0.025])
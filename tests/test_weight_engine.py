@@ -15,5 +15,13 @@ class TestWeightEngine(unittest.TestCase):
         expected_weights = pd.Series([0.200400, 0.200200, 0.199999, 0.199800, 0.199600], index=["AMD", "UBS", "USO", "GLD", "SLV"])
         np.testing.assert_almost_equal(updated_weights.values, [0.200400, 0.200200, 0.199999, 0.199800, 0.199600], decimal=5)
 
+    def test_update_weights_large_losses(self):
+        current_weights = pd.Series([0.5, 0.5], index=["AMD", "UBS"])
+        losses = pd.Series([1000.0, 1001.0], index=["AMD", "UBS"])
+
+        updated_weights = update_weights(current_weights, losses, 1.0)
+
+        np.testing.assert_almost_equal(updated_weights.values, [0.731059, 0.268941], decimal=5)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file